@@ -11,15 +11,29 @@ Usage:
     psql -c "EXPLAIN ANALYZE SELECT ..." | python explain_parser.py --postgres
 """
 
+import io
 import sys
 import re
 import json
 import argparse
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Optional
 
 
-@dataclass
+# Example: "Seq Scan on users  (cost=0.00..431.00 rows=10000 width=244) (actual time=0.015..3.123 rows=10000 loops=1)"
+_PG_NODE_RE = re.compile(
+    r'^[\s\->]*([\w\s]+?)(?:\s+on\s+([\w\.]+))?\s*'
+    r'\(cost=([\d.]+)\.\.([\d.]+)\s+rows=(\d+)\s+width=(\d+)\)'
+    r'(?:\s*\(actual time=([\d.]+)\.\.([\d.]+)\s+rows=(\d+)\s+loops=(\d+)\))?'
+)
+_PG_BUFFER_RE = re.compile(r'shared read=(\d+)')
+_PG_SKIP_PREFIXES = ('Planning', 'Execution', 'Total runtime')
+
+_SEVERITY_ORDER = {'HIGH': 0, 'MEDIUM': 1, 'LOW': 2}
+_SEVERITY_EMOJI = {'HIGH': '🔴', 'MEDIUM': '🟡', 'LOW': '🟢'}
+
+
+@dataclass(slots=True)
 class ExplainNode:
     """Represents a node in the query plan."""
     node_type: str
@@ -29,12 +43,12 @@ class ExplainNode:
     actual_time: Optional[float]
     actual_rows: Optional[int]
     loops: Optional[int]
-    children: list
     raw: str
-    warnings: list
+    children: list = field(default_factory=list)
+    warnings: list = field(default_factory=list)
 
 
-@dataclass 
+@dataclass(slots=True)
 class ExplainIssue:
     """Represents a detected issue in the plan."""
     severity: str  # HIGH, MEDIUM, LOW
@@ -54,17 +68,33 @@ def parse_postgres_explain(text: str) -> tuple[list[ExplainNode], list[ExplainIs
     
     for line in lines:
         # Skip planning/execution time lines
-        if line.strip().startswith(('Planning', 'Execution', 'Total runtime')):
+        if line.lstrip().startswith(_PG_SKIP_PREFIXES):
             continue
         
-        # Parse node pattern
-        # Example: "Seq Scan on users  (cost=0.00..431.00 rows=10000 width=244) (actual time=0.015..3.123 rows=10000 loops=1)"
-        node_match = re.match(
-            r'^[\s\->]*([\w\s]+?)(?:\s+on\s+([\w\.]+))?\s*'
-            r'\(cost=([\d.]+)\.\.([\d.]+)\s+rows=(\d+)\s+width=(\d+)\)'
-            r'(?:\s*\(actual time=([\d.]+)\.\.([\d.]+)\s+rows=(\d+)\s+loops=(\d+)\))?',
-            line
-        )
+        # Detail lines (Sort Method, Buffers, Filter, ...) carry no cost
+        # estimate; check them cheaply and keep the node regex for plan nodes
+        if '(cost=' not in line:
+            if 'Sort Method: external' in line:
+                issues.append(ExplainIssue(
+                    severity='HIGH',
+                    node_type='Sort',
+                    message='Sort spilling to disk',
+                    suggestion='Increase work_mem or optimize query to reduce sort size'
+                ))
+            
+            if 'Buffers: shared read' in line:
+                # High buffer reads might indicate cache misses
+                buffer_match = _PG_BUFFER_RE.search(line)
+                if buffer_match and int(buffer_match.group(1)) > 10000:
+                    issues.append(ExplainIssue(
+                        severity='LOW',
+                        node_type='Buffer',
+                        message=f'High buffer reads: {buffer_match.group(1)} pages',
+                        suggestion='Query may benefit from caching or index optimization'
+                    ))
+            continue
+        
+        node_match = _PG_NODE_RE.match(line)
         
         if node_match:
             node_type = node_match.group(1).strip()
@@ -90,9 +120,7 @@ def parse_postgres_explain(text: str) -> tuple[list[ExplainNode], list[ExplainIs
                 actual_time=actual_time,
                 actual_rows=actual_rows,
                 loops=loops,
-                children=[],
-                raw=line,
-                warnings=[]
+                raw=line
             )
             nodes.append(node)
             
@@ -122,26 +150,6 @@ def parse_postgres_explain(text: str) -> tuple[list[ExplainNode], list[ExplainIs
                     message=f'Nested loop with {loops} iterations',
                     suggestion='Consider using a hash or merge join, or add an index'
                 ))
-        
-        # Check for other warning patterns
-        if 'Sort Method: external' in line:
-            issues.append(ExplainIssue(
-                severity='HIGH',
-                node_type='Sort',
-                message='Sort spilling to disk',
-                suggestion='Increase work_mem or optimize query to reduce sort size'
-            ))
-        
-        if 'Buffers: shared read' in line:
-            # High buffer reads might indicate cache misses
-            buffer_match = re.search(r'shared read=(\d+)', line)
-            if buffer_match and int(buffer_match.group(1)) > 10000:
-                issues.append(ExplainIssue(
-                    severity='LOW',
-                    node_type='Buffer',
-                    message=f'High buffer reads: {buffer_match.group(1)} pages',
-                    suggestion='Query may benefit from caching or index optimization'
-                ))
     
     return nodes, issues
 
@@ -186,9 +194,7 @@ def parse_mysql_explain(text: str) -> tuple[list[ExplainNode], list[ExplainIssue
                 actual_time=None,
                 actual_rows=None,
                 loops=None,
-                children=[],
-                raw=line,
-                warnings=[]
+                raw=line
             )
             nodes.append(node)
             
@@ -244,9 +250,7 @@ def parse_mysql_explain_json(data: dict) -> tuple[list[ExplainNode], list[Explai
                 actual_time=None,
                 actual_rows=None,
                 loops=None,
-                children=[],
-                raw=json.dumps(table, indent=2),
-                warnings=[]
+                raw=json.dumps(table, indent=2)
             )
             nodes.append(node)
             
@@ -272,19 +276,20 @@ def parse_mysql_explain_json(data: dict) -> tuple[list[ExplainNode], list[Explai
 
 def format_report(nodes: list[ExplainNode], issues: list[ExplainIssue]) -> str:
     """Format analysis results as a readable report."""
-    lines = []
-    lines.append("=" * 60)
-    lines.append("EXPLAIN ANALYSIS REPORT")
-    lines.append("=" * 60)
+    buf = io.StringIO()
+    w = buf.write
+    w("=" * 60 + "\n")
+    w("EXPLAIN ANALYSIS REPORT\n")
+    w("=" * 60 + "\n")
     
     # Summary
-    lines.append(f"\nNodes analyzed: {len(nodes)}")
-    lines.append(f"Issues found: {len(issues)}")
+    w(f"\nNodes analyzed: {len(nodes)}\n")
+    w(f"Issues found: {len(issues)}\n")
     
     # Node summary
     if nodes:
-        lines.append("\n📊 Query Plan Nodes:")
-        lines.append("-" * 40)
+        w("\n📊 Query Plan Nodes:\n")
+        w("-" * 40 + "\n")
         for i, node in enumerate(nodes, 1):
             info = f"{i}. {node.node_type}"
             if node.relation:
@@ -293,24 +298,24 @@ def format_report(nodes: list[ExplainNode], issues: list[ExplainIssue]) -> str:
                 info += f" (rows: {node.rows})"
             if node.actual_time:
                 info += f" [{node.actual_time:.3f}ms]"
-            lines.append(info)
+            w(info + "\n")
     
     # Issues
     if issues:
-        lines.append("\n⚠️  Issues Detected:")
-        lines.append("-" * 40)
+        w("\n⚠️  Issues Detected:\n")
+        w("-" * 40 + "\n")
         
-        for issue in sorted(issues, key=lambda x: {'HIGH': 0, 'MEDIUM': 1, 'LOW': 2}[x.severity]):
-            emoji = {'HIGH': '🔴', 'MEDIUM': '🟡', 'LOW': '🟢'}[issue.severity]
-            lines.append(f"\n{emoji} [{issue.severity}] {issue.node_type}")
-            lines.append(f"   {issue.message}")
-            lines.append(f"   💡 {issue.suggestion}")
+        for issue in sorted(issues, key=lambda x: _SEVERITY_ORDER[x.severity]):
+            emoji = _SEVERITY_EMOJI[issue.severity]
+            w(f"\n{emoji} [{issue.severity}] {issue.node_type}\n")
+            w(f"   {issue.message}\n")
+            w(f"   💡 {issue.suggestion}\n")
     else:
-        lines.append("\n✅ No significant issues detected!")
+        w("\n✅ No significant issues detected!\n")
     
-    lines.append("\n" + "=" * 60)
+    w("\n" + "=" * 60)
     
-    return '\n'.join(lines)
+    return buf.getvalue()
 
 
 def main():
@@ -393,7 +398,8 @@ Examples:
                 for i in issues
             ]
         }
-        print(json.dumps(output, indent=2))
+        json.dump(output, sys.stdout, indent=2)
+        sys.stdout.write('\n')
     else:
         print(format_report(nodes, issues))
 
@@ -16,15 +16,98 @@ Usage:
     cat queries.log | python query_analyzer.py --stdin
 """
 
+import io
 import sys
 import re
+import mmap
 import argparse
-from collections import defaultdict
-from dataclasses import dataclass
-from typing import Optional
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Iterator, Optional, Union
 
 
-@dataclass
+# Patterns used on every query, compiled once at import time
+_RE_ORM_PREFIX = re.compile(r'^Executing \([^)]+\):\s*')
+_RE_QUERY_PREFIX = re.compile(r'^Query:\s*')
+# Literals, IN lists and parameter placeholders, replaced in a single pass.
+# String literals use the unrolled-loop form, which scans each literal once
+# without backtracking; an unterminated quote is left untouched so a stray
+# apostrophe cannot merge unrelated queries into one normalized key.
+# IN lists consume whole string literals, so a ')' inside a quoted value does
+# not end the list early. Unlike the old sequential passes, a colon
+# placeholder is matched before its digits, so ':1' and '12:30' become '?'
+# and '??' rather than ':?' and '?:?'.
+#
+# The leading (?=[...]) lookaheads on this and the keyword patterns below
+# list the characters a match can start with. Named groups, \b and
+# IGNORECASE otherwise stop the engine from skipping ahead to candidate
+# positions, and every alternative gets tried at every character.
+_RE_NORMALIZE = re.compile(
+    r"(?=['\d$:%I])(?:"
+    r"(?P<str>'[^'\\]*(?:\\.[^'\\]*)*')"
+    r'|(?P<num>\b\d+(?:\.\d+)?\b)'
+    r"|(?P<inlist>IN\s*\((?:'[^'\\]*(?:\\.[^'\\]*)*'|[^)'])+\))"
+    r'|(?P<dollar>\$\d+)'
+    r'|(?P<colon>:\w+)'
+    r'|(?P<pyfmt>%\(\w+\)s|%s))',
+    re.IGNORECASE
+)
+_NORM_REPL = {
+    'str': "'?'",
+    'num': '?',
+    'inlist': 'IN (?)',
+    'dollar': '?',
+    'colon': '?',
+    'pyfmt': '?',
+}
+_RE_TABLE = re.compile(r'(?=[FJIU])(?:FROM|JOIN|INTO|UPDATE)\s+["\']?(\w+)["\']?', re.IGNORECASE)
+_RE_HAS_WHERE = re.compile(r'(?=W)\bWHERE\b', re.IGNORECASE)
+_RE_HAS_LIMIT = re.compile(r'(?=L)\bLIMIT\b', re.IGNORECASE)
+_RE_HAS_JOIN = re.compile(r'(?=J)\bJOIN\b', re.IGNORECASE)
+_RE_SELECT_STAR = re.compile(r'SELECT\s+\*', re.IGNORECASE)
+_RE_PARAM_ANY = re.compile(r'\$\d+|\?|:\w+|%\(\w+\)s|%s')
+_RE_FROM_CLAUSE = re.compile(
+    r'\bFROM\b(.*?)(?:\bWHERE\b|\bGROUP\b|\bORDER\b|\bLIMIT\b|$)',
+    re.IGNORECASE | re.DOTALL
+)
+
+# Log formats as (marker, pattern); parse_log_file picks the first whose
+# lowercase marker appears near the start of the log, else the last one
+_LOG_FLAGS = re.DOTALL | re.IGNORECASE | re.MULTILINE
+_LOG_FORMAT_SOURCES = (
+    # Sequelize: Executing (default): SELECT ...
+    ('executing (', r'Executing \([^)]+\):\s*(.+?)(?=Executing|\Z)'),
+    # Prisma: Query: SELECT ...
+    ('query:', r'Query:\s*(.+?)(?=Query:|\Z)'),
+    # Generic SQL statements
+    (';', r'((?:SELECT|INSERT|UPDATE|DELETE|WITH)\s+[^;]+;)'),
+)
+_LOG_SNIFF_SIZE = 4096
+# Line by line (fallback)
+_LOG_LINE_SOURCE = r'^\s*((?:SELECT|INSERT|UPDATE|DELETE|WITH).*)$'
+
+# str patterns for stdin, bytes patterns for memory-mapped log files
+_LOG_FORMATS = tuple(
+    (marker, re.compile(src, _LOG_FLAGS)) for marker, src in _LOG_FORMAT_SOURCES
+)
+_LOG_FORMATS_BYTES = tuple(
+    (marker.encode(), re.compile(src.encode(), _LOG_FLAGS)) for marker, src in _LOG_FORMAT_SOURCES
+)
+_LOG_LINE = re.compile(_LOG_LINE_SOURCE, re.IGNORECASE | re.MULTILINE)
+_LOG_LINE_BYTES = re.compile(_LOG_LINE_SOURCE.encode(), re.IGNORECASE | re.MULTILINE)
+
+# Leading keyword -> query type (CTEs are reported as SELECTs)
+_QTYPES = {
+    'SELECT': 'SELECT',
+    'INSERT': 'INSERT',
+    'UPDATE': 'UPDATE',
+    'DELETE': 'DELETE',
+    'WITH': 'SELECT',
+}
+
+
+@dataclass(slots=True)
 class Query:
     """Represents a parsed SQL query."""
     raw: str
@@ -38,7 +121,36 @@ class Query:
     param_count: int
 
 
-@dataclass
+@dataclass(slots=True)
+class QueryBatch:
+    """Parsed queries stored column by column for the detect_* scans."""
+    raw: list[str] = field(default_factory=list)
+    normalized: list[str] = field(default_factory=list)
+    query_type: list[str] = field(default_factory=list)
+    tables: list[list[str]] = field(default_factory=list)
+    has_where: list[bool] = field(default_factory=list)
+    has_limit: list[bool] = field(default_factory=list)
+    has_join: list[bool] = field(default_factory=list)
+    selects_all: list[bool] = field(default_factory=list)
+    param_count: list[int] = field(default_factory=list)
+    
+    def append(self, q: Query) -> None:
+        """Add a parsed query to every column."""
+        self.raw.append(q.raw)
+        self.normalized.append(q.normalized)
+        self.query_type.append(q.query_type)
+        self.tables.append(q.tables)
+        self.has_where.append(q.has_where)
+        self.has_limit.append(q.has_limit)
+        self.has_join.append(q.has_join)
+        self.selects_all.append(q.selects_all)
+        self.param_count.append(q.param_count)
+    
+    def __len__(self) -> int:
+        return len(self.raw)
+
+
+@dataclass(slots=True)
 class Issue:
     """Represents a detected issue."""
     severity: str  # HIGH, MEDIUM, LOW
@@ -48,68 +160,55 @@ class Issue:
     suggestion: str
 
 
+def _normalize_repl(match: re.Match) -> str:
+    """Replacement for whichever _RE_NORMALIZE alternative matched."""
+    return _NORM_REPL[match.lastgroup]
+
+
 def normalize_query(sql: str) -> str:
     """
     Normalize a query for comparison (replace literals with placeholders).
     """
     # Remove ORM prefixes
-    sql = re.sub(r'^Executing \([^)]+\):\s*', '', sql)
-    sql = re.sub(r'^Query:\s*', '', sql)
+    sql = _RE_ORM_PREFIX.sub('', sql)
+    sql = _RE_QUERY_PREFIX.sub('', sql)
     
     # Normalize whitespace
     sql = ' '.join(sql.split())
     
-    # Replace string literals
-    sql = re.sub(r"'(?:[^'\\]|\\.)*'", "'?'", sql)
-    
-    # Replace numeric literals
-    sql = re.sub(r'\b\d+(?:\.\d+)?\b', '?', sql)
-    
-    # Replace IN lists
-    sql = re.sub(r'IN\s*\([^)]+\)', 'IN (?)', sql, flags=re.IGNORECASE)
-    
-    # Replace parameter placeholders
-    sql = re.sub(r'\$\d+', '?', sql)
-    sql = re.sub(r':\w+', '?', sql)
-    sql = re.sub(r'%\(\w+\)s', '?', sql)
-    sql = re.sub(r'%s', '?', sql)
+    # Replace string/numeric literals, IN lists and parameter placeholders
+    sql = _RE_NORMALIZE.sub(_normalize_repl, sql)
     
     return sql.upper()
 
 
+@lru_cache(maxsize=8192)
 def parse_query(sql: str) -> Query:
     """
     Parse a SQL query and extract metadata.
+    
+    Results are cached per SQL string, so repeated queries share one Query
+    instance; treat it as read-only.
     """
-    normalized = normalize_query(sql)
-    upper_sql = sql.upper()
-    
-    # Determine query type
-    if upper_sql.strip().startswith('SELECT'):
-        query_type = 'SELECT'
-    elif upper_sql.strip().startswith('INSERT'):
-        query_type = 'INSERT'
-    elif upper_sql.strip().startswith('UPDATE'):
-        query_type = 'UPDATE'
-    elif upper_sql.strip().startswith('DELETE'):
-        query_type = 'DELETE'
-    else:
-        query_type = 'OTHER'
+    # Interned so queries sharing a template share one key object in the
+    # detect_* grouping dicts
+    normalized = sys.intern(normalize_query(sql))
+    
+    # Determine query type from the first keyword only
+    head = sql.lstrip()[:6].upper().split(None, 1)
+    query_type = _QTYPES.get(head[0], 'OTHER') if head else 'OTHER'
     
     # Extract table names (simplified)
-    tables = []
-    table_pattern = r'(?:FROM|JOIN|INTO|UPDATE)\s+["\']?(\w+)["\']?'
-    tables = re.findall(table_pattern, upper_sql)
-    tables = list(set(tables))
+    tables = list({t.upper() for t in _RE_TABLE.findall(sql)})
     
     # Check for various patterns
-    has_where = 'WHERE' in upper_sql
-    has_limit = 'LIMIT' in upper_sql
-    has_join = 'JOIN' in upper_sql
-    selects_all = bool(re.search(r'SELECT\s+\*', upper_sql))
+    has_where = bool(_RE_HAS_WHERE.search(sql))
+    has_limit = bool(_RE_HAS_LIMIT.search(sql))
+    has_join = bool(_RE_HAS_JOIN.search(sql))
+    selects_all = bool(_RE_SELECT_STAR.search(sql))
     
     # Count parameters
-    param_count = len(re.findall(r'\$\d+|\?|:\w+|%\(\w+\)s|%s', sql))
+    param_count = len(_RE_PARAM_ANY.findall(sql))
     
     return Query(
         raw=sql,
@@ -124,223 +223,253 @@ def parse_query(sql: str) -> Query:
     )
 
 
-def detect_n_plus_one(queries: list[Query]) -> Optional[Issue]:
+def detect_n_plus_one(batch: QueryBatch) -> Optional[Issue]:
     """
     Detect N+1 query patterns.
     
     Pattern: One query followed by N similar queries on a related table.
     """
-    # Group consecutive similar queries
-    normalized_groups = defaultdict(list)
+    # Track [count, first_index, last_index, sample_raws] per normalized query
+    groups: dict[str, list] = {}
     
-    for i, q in enumerate(queries):
-        normalized_groups[q.normalized].append((i, q))
+    for i, (normalized, raw) in enumerate(zip(batch.normalized, batch.raw)):
+        group = groups.get(normalized)
+        if group is None:
+            groups[normalized] = [1, i, i, [raw]]
+        else:
+            group[0] += 1
+            group[2] = i
+            if len(group[3]) < 3:
+                group[3].append(raw)
     
     issues = []
-    for normalized, occurrences in normalized_groups.items():
-        if len(occurrences) >= 3:
-            # Check if they're roughly consecutive
-            indices = [i for i, _ in occurrences]
-            if max(indices) - min(indices) <= len(occurrences) * 2:
-                sample_queries = [q.raw for _, q in occurrences[:3]]
-                issues.append(Issue(
-                    severity='HIGH',
-                    category='N+1 Query',
-                    message=f'Detected {len(occurrences)} similar queries executed in sequence',
-                    queries=sample_queries,
-                    suggestion='Use eager loading (include/preload/prefetch_related) to fetch related data in one query'
-                ))
+    for count, first_index, last_index, sample_queries in groups.values():
+        # Check if they're roughly consecutive
+        if count >= 3 and last_index - first_index <= count * 2:
+            issues.append(Issue(
+                severity='HIGH',
+                category='N+1 Query',
+                message=f'Detected {count} similar queries executed in sequence',
+                queries=sample_queries,
+                suggestion='Use eager loading (include/preload/prefetch_related) to fetch related data in one query'
+            ))
     
     return issues if issues else None
 
 
-def detect_missing_where(queries: list[Query]) -> list[Issue]:
+def detect_missing_where(batch: QueryBatch) -> list[Issue]:
     """
     Detect SELECT queries without WHERE clause (potential full table scans).
     """
     issues = []
     
-    for q in queries:
-        if q.query_type == 'SELECT' and not q.has_where and not q.has_limit:
-            issues.append(Issue(
-                severity='MEDIUM',
-                category='Missing WHERE',
-                message='SELECT query without WHERE clause may cause full table scan',
-                queries=[q.raw],
-                suggestion='Add WHERE clause or LIMIT to prevent scanning entire table'
-            ))
+    missing = [
+        raw for query_type, has_where, has_limit, raw
+        in zip(batch.query_type, batch.has_where, batch.has_limit, batch.raw)
+        if query_type == 'SELECT' and not has_where and not has_limit
+    ]
+    
+    if missing:
+        issues.append(Issue(
+            severity='MEDIUM',
+            category='Missing WHERE',
+            message=f'Found {len(missing)} SELECT queries without WHERE clause (may cause full table scans)',
+            queries=missing[:3],
+            suggestion='Add WHERE clause or LIMIT to prevent scanning entire table'
+        ))
     
     return issues
 
 
-def detect_select_star(queries: list[Query]) -> list[Issue]:
+def detect_select_star(batch: QueryBatch) -> list[Issue]:
     """
     Detect SELECT * queries (over-fetching).
     """
     issues = []
     
-    select_star_queries = [q for q in queries if q.selects_all and q.query_type == 'SELECT']
+    select_star_queries = [
+        raw for query_type, selects_all, raw in zip(batch.query_type, batch.selects_all, batch.raw)
+        if selects_all and query_type == 'SELECT'
+    ]
     
     if select_star_queries:
         issues.append(Issue(
             severity='LOW',
             category='SELECT *',
             message=f'Found {len(select_star_queries)} queries using SELECT *',
-            queries=[q.raw for q in select_star_queries[:3]],
+            queries=select_star_queries[:3],
             suggestion='Select only needed columns to reduce data transfer and memory usage'
         ))
     
     return issues
 
 
-def detect_duplicate_queries(queries: list[Query]) -> list[Issue]:
+def detect_duplicate_queries(batch: QueryBatch) -> list[Issue]:
     """
-    Detect identical queries executed multiple times.
+    Detect identical queries (ignoring literal values) executed multiple times.
     """
     issues = []
     
-    query_counts = defaultdict(list)
-    for q in queries:
-        query_counts[q.raw].append(q)
+    query_counts = Counter(batch.normalized)
+    samples = {}
+    for normalized, raw in zip(batch.normalized, batch.raw):
+        samples.setdefault(normalized, raw)
     
-    for raw_query, occurrences in query_counts.items():
-        if len(occurrences) >= 3:
+    for normalized, count in query_counts.items():
+        if count >= 3:
             issues.append(Issue(
                 severity='MEDIUM',
                 category='Duplicate Query',
-                message=f'Identical query executed {len(occurrences)} times',
-                queries=[raw_query],
+                message=f'Identical query executed {count} times (ignoring literal values)',
+                queries=[samples[normalized]],
                 suggestion='Consider caching the result or restructuring code to avoid repeated queries'
             ))
     
     return issues
 
 
-def detect_cartesian_join(queries: list[Query]) -> list[Issue]:
+def detect_cartesian_join(batch: QueryBatch) -> list[Issue]:
     """
     Detect potential Cartesian joins (multiple tables without proper JOIN/WHERE).
     """
     issues = []
     
-    for q in queries:
-        if q.query_type == 'SELECT' and len(q.tables) > 1:
+    columns = zip(batch.query_type, batch.tables, batch.has_join, batch.raw)
+    for query_type, tables, has_join, raw in columns:
+        if query_type == 'SELECT' and len(tables) > 1 and not has_join:
             # Check for comma-separated tables without JOIN keyword
-            if not q.has_join and ',' in q.raw.upper().split('FROM')[1].split('WHERE')[0] if 'FROM' in q.raw.upper() else False:
+            from_clause = _RE_FROM_CLAUSE.search(raw)
+            if from_clause and ',' in from_clause.group(1):
                 issues.append(Issue(
                     severity='HIGH',
                     category='Cartesian Join',
                     message='Possible Cartesian join detected (comma-separated tables)',
-                    queries=[q.raw],
+                    queries=[raw],
                     suggestion='Use explicit JOIN with ON clause to specify relationship'
                 ))
     
     return issues
 
 
-def analyze_queries(queries: list[Query]) -> list[Issue]:
+def analyze_queries(batch: QueryBatch) -> list[Issue]:
     """
     Run all analyzers and collect issues.
     """
     all_issues = []
     
     # N+1 detection
-    n_plus_one = detect_n_plus_one(queries)
+    n_plus_one = detect_n_plus_one(batch)
     if n_plus_one:
         all_issues.extend(n_plus_one)
     
     # Other detections
-    all_issues.extend(detect_missing_where(queries))
-    all_issues.extend(detect_select_star(queries))
-    all_issues.extend(detect_duplicate_queries(queries))
-    all_issues.extend(detect_cartesian_join(queries))
+    all_issues.extend(detect_missing_where(batch))
+    all_issues.extend(detect_select_star(batch))
+    all_issues.extend(detect_duplicate_queries(batch))
+    all_issues.extend(detect_cartesian_join(batch))
     
     return all_issues
 
 
-def format_report(issues: list[Issue], queries: list[Query]) -> str:
+def format_report(issues: list[Issue], batch: QueryBatch) -> str:
     """
     Format analysis results as a readable report.
     """
-    lines = []
-    lines.append("=" * 60)
-    lines.append("QUERY ANALYSIS REPORT")
-    lines.append("=" * 60)
-    lines.append(f"\nTotal queries analyzed: {len(queries)}")
-    lines.append(f"Issues found: {len(issues)}")
-    
-    # Summary by severity
+    buf = io.StringIO()
+    w = buf.write
+    w("=" * 60 + "\n")
+    w("QUERY ANALYSIS REPORT\n")
+    w("=" * 60 + "\n")
+    w(f"\nTotal queries analyzed: {len(batch)}\n")
+    w(f"Issues found: {len(issues)}\n")
+    
+    # Count by severity and group by category in one pass
     severity_counts = defaultdict(int)
+    by_category = defaultdict(list)
     for issue in issues:
         severity_counts[issue.severity] += 1
+        by_category[issue.category].append(issue)
     
+    # Summary by severity
     if severity_counts:
-        lines.append("\nSeverity breakdown:")
+        w("\nSeverity breakdown:\n")
         for severity in ['HIGH', 'MEDIUM', 'LOW']:
             if severity_counts[severity]:
-                lines.append(f"  {severity}: {severity_counts[severity]}")
-    
-    # Group by category
-    by_category = defaultdict(list)
-    for issue in issues:
-        by_category[issue.category].append(issue)
+                w(f"  {severity}: {severity_counts[severity]}\n")
     
-    lines.append("\n" + "-" * 60)
+    w("\n" + "-" * 60 + "\n")
     
     for category, cat_issues in by_category.items():
-        lines.append(f"\n📌 {category} ({len(cat_issues)} issue(s))")
-        lines.append("-" * 40)
+        w(f"\n📌 {category} ({len(cat_issues)} issue(s))\n")
+        w("-" * 40 + "\n")
         
         for issue in cat_issues[:5]:  # Limit to 5 per category
-            lines.append(f"\n  Severity: {issue.severity}")
-            lines.append(f"  {issue.message}")
-            lines.append(f"\n  Example query:")
+            w(f"\n  Severity: {issue.severity}\n")
+            w(f"  {issue.message}\n")
+            w(f"\n  Example query:\n")
             for q in issue.queries[:1]:
                 # Truncate long queries
                 q_display = q[:200] + "..." if len(q) > 200 else q
-                lines.append(f"    {q_display}")
-            lines.append(f"\n  💡 Suggestion: {issue.suggestion}")
+                w(f"    {q_display}\n")
+            w(f"\n  💡 Suggestion: {issue.suggestion}\n")
     
     if not issues:
-        lines.append("\n✅ No issues detected!")
+        w("\n✅ No issues detected!\n")
     
-    lines.append("\n" + "=" * 60)
+    w("\n" + "=" * 60)
     
-    return '\n'.join(lines)
+    return buf.getvalue()
+
+
+def open_log_file(path: str) -> Union[mmap.mmap, bytes]:
+    """
+    Memory-map a log file so it can be scanned without decoding it all.
+    Files that cannot be mapped (empty files, pipes) are read as bytes.
+    """
+    with open(path, 'rb') as f:
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            return f.read()
+
 
+def _match_text(match: re.Match) -> str:
+    """Return the stripped first group of a log match, decoding bytes."""
+    text = match.group(1)
+    if isinstance(text, bytes):
+        text = text.decode('utf-8', 'replace')
+    return text.strip()
 
-def parse_log_file(content: str) -> list[str]:
+
+def parse_log_file(content: Union[str, bytes, mmap.mmap]) -> Iterator[str]:
     """
-    Parse a log file and extract SQL queries.
+    Parse a log file and yield SQL queries as they are found.
     Handles various log formats.
+    
+    Bytes-like content (e.g. from open_log_file) is scanned with bytes
+    patterns and only the matched queries are decoded.
     """
-    queries = []
-    
-    # Try to match common patterns
-    patterns = [
-        # Sequelize: Executing (default): SELECT ...
-        r'Executing \([^)]+\):\s*(.+?)(?=Executing|\Z)',
-        # Prisma: Query: SELECT ...
-        r'Query:\s*(.+?)(?=Query:|\Z)',
-        # Generic SQL statements
-        r'((?:SELECT|INSERT|UPDATE|DELETE|WITH)\s+.+?;)',
-        # Line by line (fallback)
-        r'^(.+?)$'
-    ]
+    if isinstance(content, str):
+        formats, line_pattern = _LOG_FORMATS, _LOG_LINE
+    else:
+        formats, line_pattern = _LOG_FORMATS_BYTES, _LOG_LINE_BYTES
     
-    for pattern in patterns[:3]:  # Skip line-by-line fallback first
-        matches = re.findall(pattern, content, re.DOTALL | re.IGNORECASE | re.MULTILINE)
-        if matches:
-            queries = [m.strip() for m in matches if m.strip()]
-            break
+    # Detect the log format once from the head instead of trying every
+    # pattern against the whole content
+    head = content[:_LOG_SNIFF_SIZE].lower()
+    pattern = next((p for marker, p in formats if marker in head), formats[-1][1])
     
-    # Fallback: treat each line as a potential query
-    if not queries:
-        for line in content.split('\n'):
-            line = line.strip()
-            if line and any(line.upper().startswith(kw) for kw in ['SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH']):
-                queries.append(line)
+    found = False
+    for match in pattern.finditer(content):
+        query = _match_text(match)
+        if query:
+            found = True
+            yield query
     
-    return queries
+    # Fallback: treat each line as a potential query
+    if not found:
+        for match in line_pattern.finditer(content):
+            yield _match_text(match)
 
 
 def main():
@@ -370,8 +499,7 @@ Examples:
                 sys.exit(1)
             content = sys.stdin.read()
         else:
-            with open(args.logfile, 'r', encoding='utf-8', errors='replace') as f:
-                content = f.read()
+            content = open_log_file(args.logfile)
     except FileNotFoundError:
         print(f"Error: File not found: {args.logfile}", file=sys.stderr)
         sys.exit(1)
@@ -383,13 +511,14 @@ Examples:
         sys.exit(1)
     
     # Parse and analyze
-    raw_queries = parse_log_file(content)
-    if not raw_queries:
+    batch = QueryBatch()
+    for sql in parse_log_file(content):
+        batch.append(parse_query(sql))
+    if not batch:
         print("No SQL queries found in input.")
         sys.exit(1)
     
-    parsed_queries = [parse_query(q) for q in raw_queries]
-    issues = analyze_queries(parsed_queries)
+    issues = analyze_queries(batch)
     
     # Filter by severity
     severity_order = {'LOW': 0, 'MEDIUM': 1, 'HIGH': 2}
@@ -400,7 +529,7 @@ Examples:
     if args.json:
         import json
         output = {
-            'total_queries': len(parsed_queries),
+            'total_queries': len(batch),
             'issues': [
                 {
                     'severity': i.severity,
@@ -412,9 +541,10 @@ Examples:
                 for i in issues
             ]
         }
-        print(json.dumps(output, indent=2))
+        json.dump(output, sys.stdout, indent=2)
+        sys.stdout.write('\n')
     else:
-        print(format_report(issues, parsed_queries))
+        print(format_report(issues, batch))
 
 
 if __name__ == '__main__':
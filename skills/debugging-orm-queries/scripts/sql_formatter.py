@@ -9,10 +9,14 @@ Usage:
     python sql_formatter.py --file query.sql
 """
 
+import io
+import os
 import sys
+import codecs
 import re
 import argparse
-from typing import Optional
+from functools import lru_cache
+from typing import BinaryIO, Callable, Iterator, Optional
 
 
 KEYWORDS = [
@@ -25,6 +29,7 @@ KEYWORDS = [
     'LIKE', 'IS NULL', 'IS NOT NULL', 'ASC', 'DESC', 'NULLS FIRST', 'NULLS LAST',
     'WITH', 'RECURSIVE', 'RETURNING', 'CONFLICT', 'DO UPDATE', 'DO NOTHING'
 ]
+KEYWORDS_SET = frozenset(KEYWORDS)
 
 NEWLINE_BEFORE = [
     'SELECT', 'FROM', 'WHERE', 'AND', 'OR', 'LEFT JOIN', 'RIGHT JOIN',
@@ -33,9 +38,129 @@ NEWLINE_BEFORE = [
     'UNION', 'UNION ALL', 'EXCEPT', 'INTERSECT', 'RETURNING', 'WITH'
 ]
 
-INDENT_KEYWORDS = ['AND', 'OR', 'ON']
+INDENT_KEYWORDS = frozenset({'AND', 'OR', 'ON'})
 
+# Keywords spanning several words (matched with any whitespace between them)
+MULTI_WORD_KEYWORDS = [
+    'LEFT JOIN', 'RIGHT JOIN', 'INNER JOIN', 'OUTER JOIN', 
+    'FULL JOIN', 'CROSS JOIN', 'LEFT OUTER JOIN', 'RIGHT OUTER JOIN',
+    'GROUP BY', 'ORDER BY', 'UNION ALL', 'IS NULL', 'IS NOT NULL',
+    'NOT IN', 'NOT EXISTS', 'INSERT INTO', 'DELETE FROM', 'CREATE TABLE',
+    'ALTER TABLE', 'DROP TABLE', 'NULLS FIRST', 'NULLS LAST',
+    'DO UPDATE', 'DO NOTHING'
+]
+
+# Where format_sql adds newlines
+NEWLINE_KEYWORDS = [
+    'LEFT OUTER JOIN', 'RIGHT OUTER JOIN',
+    'LEFT JOIN', 'RIGHT JOIN', 'INNER JOIN', 'OUTER JOIN', 
+    'FULL JOIN', 'CROSS JOIN',
+    'SELECT', 'FROM', 'WHERE', 'AND', 'OR',
+    'GROUP BY', 'HAVING', 'ORDER BY', 'LIMIT', 'OFFSET', 
+    'SET', 'VALUES', 'UNION ALL', 'UNION', 'EXCEPT', 
+    'INTERSECT', 'RETURNING', 'WITH'
+]
+
+# Every keyword format_sql recognizes
+ALL_KEYWORDS = sorted(KEYWORDS_SET | set(MULTI_WORD_KEYWORDS) | set(NEWLINE_KEYWORDS))
+
+
+def _build_keyword_trie(keywords: list[str]) -> dict:
+    """Word-level trie: each node maps the next word to a child node, and
+    the key None holds the keyword that ends at that node."""
+    trie = {}
+    for kw in keywords:
+        node = trie
+        for word in kw.split():
+            node = node.setdefault(word, {})
+        node[None] = kw
+    return trie
+
+
+_KEYWORD_TRIE = _build_keyword_trie(ALL_KEYWORDS)
+_NEWLINE_SET = frozenset(NEWLINE_KEYWORDS)
 
+# Splitting on this yields [text, token, text, token, ..., text] where a
+# token is a string literal (kept verbatim) or a word
+_TOKEN_RE = re.compile(r"('[^'\\]*(?:\\.[^'\\]*)*'|\w+)")
+
+# Lines starting with these are indented; only the first few characters of
+# a line need uppercasing to check
+_INDENT_PREFIXES = tuple(kw + ' ' for kw in sorted(INDENT_KEYWORDS))
+_INDENT_HEAD_LEN = max(len(prefix) for prefix in _INDENT_PREFIXES)
+
+# Placeholder styles: $1, ?, :name, %(name)s, %s
+_PARAM_PATTERN = re.compile(r'\$\d+|\?|:\w+|%\(\w+\)s|%s')
+
+_COLORS = {
+    'keyword': '\033[94m',   # Blue
+    'string': '\033[92m',    # Green
+    'number': '\033[93m',    # Yellow
+    'reset': '\033[0m'
+}
+
+# Everything highlight_sql colours, in one pass; the group name is the
+# colour to use. Strings come first so their contents stay green. The
+# leading lookahead lets the engine skip positions that cannot start a
+# match, which named groups and \b otherwise prevent.
+_HIGHLIGHT_FIRST_CHARS = ''.join(sorted({kw[0] for kw in KEYWORDS}))
+_HIGHLIGHT_PATTERN = re.compile(
+    r"(?=['\d" + _HIGHLIGHT_FIRST_CHARS + r"])"
+    r"(?:(?P<string>'[^'\\]*(?:\\.[^'\\]*)*')"
+    r"|(?P<number>\b\d+(?:\.\d+)?\b)"
+    r"|(?P<keyword>\b(?:" + '|'.join(
+        re.escape(kw).replace(r'\ ', r'\s+') for kw in sorted(KEYWORDS, key=len, reverse=True)
+    ) + r")\b))",
+    re.IGNORECASE
+)
+
+
+def _tokenize(sql: str, uppercase: bool) -> list[str]:
+    """
+    Scan SQL left to right, fixing keyword case and breaking lines before
+    clause keywords. String literals are never rewritten.
+    """
+    parts = _TOKEN_RE.split(sql)
+    n = len(parts)
+    out = [parts[0]]
+    i = 1
+    while i < n:
+        token = parts[i]
+        # Keywords are ASCII, so one str.upper() and a dict lookup decide
+        # the case; string literals are never uppercased at all
+        node = None if token[0] == "'" else _KEYWORD_TRIE.get(token.upper())
+        keyword = None
+        end = i
+        
+        # Follow the trie across whitespace-separated words for the
+        # longest multi-word keyword (LEFT OUTER JOIN over LEFT JOIN)
+        j = i
+        while node is not None:
+            if None in node:
+                keyword, end = node[None], j
+            if j + 2 >= n or not parts[j + 1].isspace():
+                break
+            node = node.get(parts[j + 2].upper())
+            j += 2
+        
+        if keyword is None:
+            out.append(token)
+        else:
+            # Only break lines at whitespace, never right after "(" or ",";
+            # the whitespace itself is replaced by the newline
+            if keyword in _NEWLINE_SET and parts[i - 1][-1:].isspace():
+                out[-1] = parts[i - 1].rstrip()
+                out.append('\n')
+            out.append(keyword if uppercase else ''.join(parts[i:end + 1]))
+        out.append(parts[end + 1])
+        i = end + 2
+    
+    return out
+
+
+# Small bounded memo: statements repeated in a streamed ORM log are formatted
+# once, while only a few hundred statements are ever kept alive
+@lru_cache(maxsize=256)
 def format_sql(sql: str, indent: int = 2, uppercase: bool = True) -> str:
     """
     Format SQL query with proper indentation and line breaks.
@@ -48,57 +173,19 @@ def format_sql(sql: str, indent: int = 2, uppercase: bool = True) -> str:
     Returns:
         Formatted SQL string
     """
-    # Normalize whitespace
+    # Normalize whitespace (split/join runs in C and beats re.sub(r"\s+"))
     sql = ' '.join(sql.split())
     
     # Remove ORM prefixes (e.g., "Executing (default): " from Sequelize)
-    sql = re.sub(r'^Executing \([^)]+\):\s*', '', sql)
-    sql = re.sub(r'^Query:\s*', '', sql)
-    
-    # Protect multi-word keywords by replacing spaces with placeholders
-    multi_word_keywords = [
-        'LEFT JOIN', 'RIGHT JOIN', 'INNER JOIN', 'OUTER JOIN', 
-        'FULL JOIN', 'CROSS JOIN', 'LEFT OUTER JOIN', 'RIGHT OUTER JOIN',
-        'GROUP BY', 'ORDER BY', 'UNION ALL', 'IS NULL', 'IS NOT NULL',
-        'NOT IN', 'NOT EXISTS', 'INSERT INTO', 'DELETE FROM', 'CREATE TABLE',
-        'ALTER TABLE', 'DROP TABLE', 'NULLS FIRST', 'NULLS LAST',
-        'DO UPDATE', 'DO NOTHING'
-    ]
-    
-    placeholders = {}
-    for i, kw in enumerate(multi_word_keywords):
-        placeholder = f"__KW{i}__"
-        placeholders[placeholder] = kw.upper()
-        pattern = re.compile(re.escape(kw), re.IGNORECASE)
-        sql = pattern.sub(placeholder, sql)
-    
-    # Uppercase single-word keywords
-    if uppercase:
-        single_keywords = [kw for kw in KEYWORDS if ' ' not in kw]
-        for kw in single_keywords:
-            pattern = re.compile(r'\b' + kw + r'\b', re.IGNORECASE)
-            sql = pattern.sub(kw, sql)
-    
-    # Restore multi-word keywords (now uppercased)
-    for placeholder, kw in placeholders.items():
-        sql = sql.replace(placeholder, kw)
-    
-    # Define where to add newlines
-    newline_keywords = [
-        'LEFT OUTER JOIN', 'RIGHT OUTER JOIN',
-        'LEFT JOIN', 'RIGHT JOIN', 'INNER JOIN', 'OUTER JOIN', 
-        'FULL JOIN', 'CROSS JOIN',
-        'SELECT', 'FROM', 'WHERE', 'AND', 'OR',
-        'GROUP BY', 'HAVING', 'ORDER BY', 'LIMIT', 'OFFSET', 
-        'SET', 'VALUES', 'UNION ALL', 'UNION', 'EXCEPT', 
-        'INTERSECT', 'RETURNING', 'WITH'
-    ]
-    
-    # Add newlines before keywords (process longer ones first)
-    for kw in sorted(newline_keywords, key=len, reverse=True):
-        # Don't add newline if already at start of line
-        pattern = re.compile(r'(?<!\n)\s+(' + re.escape(kw) + r')\b', re.IGNORECASE)
-        sql = pattern.sub(r'\n\1', sql)
+    if sql.startswith('Executing ('):
+        end = sql.find(')', 11)
+        if end > 11 and sql.startswith(':', end + 1):
+            sql = sql[end + 2:].lstrip()
+    if sql.startswith('Query:'):
+        sql = sql[6:].lstrip()
+    
+    # Fix keyword case and add newlines before keywords in one pass
+    sql = ''.join(_tokenize(sql, uppercase))
     
     # Indent continuation keywords
     lines = sql.split('\n')
@@ -110,9 +197,9 @@ def format_sql(sql: str, indent: int = 2, uppercase: bool = True) -> str:
         if not line:
             continue
         
-        # Check if line starts with indent keyword
-        first_word = line.split()[0] if line.split() else ''
-        if first_word.upper() in INDENT_KEYWORDS:
+        # Check if line starts with indent keyword (any case)
+        head = line[:_INDENT_HEAD_LEN].upper()
+        if head.startswith(_INDENT_PREFIXES) or head in INDENT_KEYWORDS:
             formatted_lines.append(indent_str + line)
         else:
             formatted_lines.append(line)
@@ -127,34 +214,93 @@ def extract_params(sql: str) -> tuple[str, list[str]]:
     Returns:
         Tuple of (sql_with_numbered_params, list_of_original_placeholders)
     """
-    # Match various placeholder styles: $1, ?, :name, %(name)s
-    placeholders = re.findall(r'\$\d+|\?|:\w+|%\(\w+\)s|%s', sql)
+    placeholders = _PARAM_PATTERN.findall(sql)
     return sql, placeholders
 
 
+@lru_cache(maxsize=64)
 def highlight_sql(sql: str) -> str:
     """
     Add ANSI color codes for terminal output.
     """
-    colors = {
-        'keyword': '\033[94m',   # Blue
-        'string': '\033[92m',    # Green
-        'number': '\033[93m',    # Yellow
-        'reset': '\033[0m'
-    }
+    colors = _COLORS
     
-    # Highlight keywords
-    for kw in KEYWORDS:
-        pattern = re.compile(r'\b(' + kw.replace(' ', r'\s+') + r')\b', re.IGNORECASE)
-        sql = pattern.sub(colors['keyword'] + r'\1' + colors['reset'], sql)
+    # Copy plain text through and wrap each match in its colour
+    buf = io.StringIO()
+    last = 0
+    for m in _HIGHLIGHT_PATTERN.finditer(sql):
+        buf.write(sql[last:m.start()])
+        buf.write(colors[m.lastgroup])
+        buf.write(m.group())
+        buf.write(colors['reset'])
+        last = m.end()
+    buf.write(sql[last:])
     
-    # Highlight strings
-    sql = re.sub(r"('(?:[^'\\]|\\.)*')", colors['string'] + r'\1' + colors['reset'], sql)
+    return buf.getvalue()
+
+
+def iter_statements(stream: BinaryIO, chunk_size: int = 65536) -> Iterator[str]:
+    """
+    Yield ';'-terminated statements from a binary stream as they arrive.
+    
+    Boundaries are found by ';' with an even number of single quotes before
+    it in the statement. An apostrophe in a -- comment or a double-quoted
+    identifier, or a backslash-escaped \\', upsets that count: later ';' are
+    then ignored and the rest of the input is buffered as one statement.
+    Memory stays at about one statement only when there are no stray quotes.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    buf = ''
+    pos = 0        # buf[:pos] has been scanned
+    in_quote = 0   # parity of the quotes in buf[:pos], carried across chunks
+    while True:
+        chunk = stream.read1(chunk_size)
+        buf += decoder.decode(chunk, final=not chunk)
+        
+        start = 0
+        while (end := buf.find(';', pos)) != -1:
+            # Count each character once, so a stray quote cannot make
+            # every later ';' rescan the statement
+            in_quote ^= buf.count("'", pos, end) & 1
+            pos = end + 1
+            # A ';' inside a quoted literal is not a statement boundary
+            if not in_quote:
+                # Skip empty statements such as the second ';' in ';;'
+                if buf[start:end].strip():
+                    yield buf[start:pos]
+                start = pos
+        in_quote ^= buf.count("'", pos) & 1
+        buf = buf[start:]
+        pos = len(buf)
+        
+        if not chunk:
+            if buf.strip():
+                yield buf
+            return
+
+
+def _make_highlighter(enabled: bool) -> Callable[[str], str]:
+    """
+    Choose the output colouring once per run: highlight_sql, or a no-op
+    when colour is disabled or stdout is not a terminal.
+    """
+    if not enabled:
+        return lambda sql: sql
+    return highlight_sql
+
+
+def print_formatted(sql: str, args: argparse.Namespace, highlight: Callable[[str], str]) -> None:
+    """Format one statement and print it according to the CLI options."""
+    formatted = format_sql(sql, indent=args.indent, uppercase=not args.lowercase)
     
-    # Highlight numbers
-    sql = re.sub(r'\b(\d+(?:\.\d+)?)\b', colors['number'] + r'\1' + colors['reset'], sql)
+    # Show parameter info if requested
+    if args.params:
+        _, placeholders = extract_params(formatted)
+        if placeholders:
+            print("Parameters:", placeholders)
+            print("-" * 40)
     
-    return sql
+    print(highlight(formatted))
 
 
 def main():
@@ -181,12 +327,13 @@ Examples:
     # Get SQL from various sources with error handling
     try:
         if args.file:
-            with open(args.file, 'r', encoding='utf-8', errors='replace') as f:
-                sql = f.read()
+            with open(args.file, 'rb') as f:
+                statements = [f.read().decode('utf-8', errors='replace')]
         elif args.sql:
-            sql = args.sql
+            statements = [args.sql]
         elif not sys.stdin.isatty():
-            sql = sys.stdin.read()
+            # Format stdin statement by statement instead of reading it all
+            statements = iter_statements(sys.stdin.buffer)
         else:
             parser.print_help()
             sys.exit(1)
@@ -200,25 +347,37 @@ Examples:
         print(f"Error reading input: {e}", file=sys.stderr)
         sys.exit(1)
     
-    if not sql or not sql.strip():
-        print("Error: No SQL provided", file=sys.stderr)
-        sys.exit(1)
-    
-    # Format the SQL
-    formatted = format_sql(sql, indent=args.indent, uppercase=not args.lowercase)
-    
-    # Show parameter info if requested
-    if args.params:
-        _, placeholders = extract_params(formatted)
-        if placeholders:
-            print("Parameters:", placeholders)
-            print("-" * 40)
-    
     # Add colors if terminal supports it and not disabled
-    if not args.no_color and sys.stdout.isatty():
-        formatted = highlight_sql(formatted)
+    highlight = _make_highlighter(not args.no_color and sys.stdout.isatty())
     
-    print(formatted)
+    found = False
+    statements = iter(statements)
+    while True:
+        # Only reading input is reported as an input error; stdin is read
+        # lazily, so the read happens here rather than above
+        try:
+            sql = next(statements, None)
+        except OSError as e:
+            print(f"Error reading input: {e}", file=sys.stderr)
+            sys.exit(1)
+        if sql is None:
+            break
+        if not sql.strip():
+            continue
+        found = True
+        
+        try:
+            print_formatted(sql, args, highlight)
+        except BrokenPipeError:
+            # Output was closed early (e.g. piped into head); stop quietly
+            # and keep the interpreter from failing to flush stdout on exit
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, sys.stdout.fileno())
+            sys.exit(1)
+    
+    if not found:
+        print("Error: No SQL provided", file=sys.stderr)
+        sys.exit(1)
 
 
 if __name__ == '__main__':